@@ -24,25 +24,50 @@ Ejecución:
     
     # Especificando directorio del dataset
     python load-dataset.py --dataset-dir ./mi-dataset/csv
+    
+    # Carga inicial: vacía las tablas de componentes y las carga desde cero
+    python load-dataset.py --initial-load
 """
 
 import argparse
 import csv
 import hashlib
+import math
 import os
 import pathlib
 import sys
-from datetime import datetime
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache, partial
+from itertools import chain, islice
 from slugify import slugify
 
 import psycopg2
-from psycopg2.extras import execute_batch, DictCursor
 from dotenv import load_dotenv
 
 
 # Directorio por defecto del dataset
 DEFAULT_DATASET_DIR = pathlib.Path("dataset/csv")
 
+# Parámetros de conexión por defecto: la carga va en una sola transacción larga,
+# así que se activan los keepalives TCP para que un proxy o NAT no corte la
+# conexión mientras se esperan los resultados de los workers. Solo se aplican si
+# ni el DSN ni las variables de entorno de libpq fijan ya ese parámetro
+CONNECT_OPTIONS = {
+    "connect_timeout": 10,
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 5,
+}
+
+# Variables de entorno con las que libpq también fija esos parámetros
+CONNECT_OPTIONS_ENV = {
+    "connect_timeout": "PGCONNECT_TIMEOUT",
+}
+
 # Campos "estándar" del esquema components
 STANDARD_FIELDS = {
     "name",
@@ -68,6 +93,71 @@ ALIAS_MAP = {
     "available": "in_stock",
 }
 
+# Valores de texto reconocidos como booleanos
+BOOL_MAP = {
+    "true": True,
+    "t": True,
+    "1": True,
+    "yes": True,
+    "y": True,
+    "available": True,
+    "in stock": True,
+    "false": False,
+    "f": False,
+    "0": False,
+    "no": False,
+    "n": False,
+    "out of stock": False,
+    "unavailable": False,
+}
+
+# Columnas que se cargan vía COPY en cada tabla (la de staging se llama _staging_<tabla>)
+COMPONENT_COLUMNS = (
+    "id",
+    "category",
+    "name",
+    "brand",
+    "price",
+    "previous_price",
+    "image_url",
+    "product_url",
+    "in_stock",
+    "stock_units",
+)
+ATTRIBUTE_COLUMNS = ("component_id", "attribute_key", "attribute_value")
+TAG_COLUMNS = ("component_id", "tag")
+COPY_COLUMNS = {
+    "components": COMPONENT_COLUMNS,
+    "component_attributes": ATTRIBUTE_COLUMNS,
+    "component_tags": TAG_COLUMNS,
+}
+
+# Marcador de NULL en los streams de COPY
+COPY_NULL = r"\N"
+
+# Tamaño del buffer con el que se escribe el CSV de cada tabla en disco y de los
+# bloques que lee COPY: la memoria de la carga no depende del tamaño del archivo
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Columnas que nunca son NULL: COPY no las compara con el marcador de NULL, así
+# que un "\N" que venga en los datos se guarda tal cual (FORCE_NOT_NULL)
+NOT_NULL_COLUMNS = {
+    "id",
+    "category",
+    "name",
+    "component_id",
+    "attribute_key",
+    "attribute_value",
+    "tag",
+}
+
+# Rangos que admiten las columnas numéricas de components. Los precios son
+# NUMERIC(12,2) y PostgreSQL redondea a dos decimales antes de comprobar el
+# límite, así que 9999999999.995 ya no cabe; stock_units es un INTEGER
+PRICE_LIMIT = 9_999_999_999.995
+INT_MIN = -2**31
+INT_MAX = 2**31 - 1
+
 # Mapeo de categorías del CSV a los nombres en la BD
 CATEGORY_MAP = {
     "cpu": "CPU",
@@ -99,14 +189,22 @@ CATEGORY_MAP = {
 }
 
 
+@lru_cache(maxsize=1024)
 def normalize_field(field_name: str) -> str:
-    """Normaliza nombres de campos usando el mapa de alias."""
+    """Normaliza nombres de campos usando el mapa de alias.
+
+    Se memoriza porque las mismas cabeceras se repiten en casi todos los archivos.
+    """
     field_name = field_name.strip().lower()
     return ALIAS_MAP.get(field_name, field_name)
 
 
+@lru_cache(maxsize=1024)
 def normalize_category(category_name: str) -> str:
-    """Normaliza nombres de categorías."""
+    """Normaliza nombres de categorías.
+
+    Se memoriza para no repetir slugify con nombres que ya se han visto.
+    """
     category_slug = slugify(category_name).replace("-", "_").lower()
     return CATEGORY_MAP.get(category_slug, category_slug.upper())
 
@@ -115,99 +213,379 @@ def bool_from_value(value: str):
     """Convierte un string a booleano."""
     if value is None:
         return None
-    value = value.strip().lower()
-    if value in {"true", "t", "1", "yes", "y", "available", "in stock"}:
-        return True
-    if value in {"false", "f", "0", "no", "n", "out of stock", "unavailable"}:
-        return False
-    return None
+    return BOOL_MAP.get(value.strip().lower())
 
 
-def hash_component_id(category: str, name: str, url: str) -> str:
-    """Genera un ID único para un componente basado en categoría, nombre y URL."""
-    base = f"{category}|{name}|{url}"
-    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+def float_from_value(value: str):
+    """Convierte un string a float, o None si está vacío o no es un número válido.
 
+    También se descartan NaN, infinito y los valores que no caben en una columna
+    NUMERIC(12,2): un solo valor fuera de rango abortaría toda la carga.
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) and abs(number) < PRICE_LIMIT else None
+
+
+def int_from_value(value: str):
+    """Convierte un string a entero, o None si está vacío o no es un entero válido.
+
+    También se descartan los valores que no caben en una columna INTEGER.
+    """
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if INT_MIN <= number <= INT_MAX else None
+
+
+class CopyNull(int):
+    """Valor que se escribe como COPY_NULL en las filas de componentes.
+
+    Ese writer cita todo el texto (QUOTE_NONNUMERIC) para que un "\\N" real de
+    brand, image_url o product_url no se lea como NULL. csv solo deja sin
+    comillas los valores numéricos, así que el marcador es un int que se
+    imprime como COPY_NULL.
+    """
+
+    def __str__(self):
+        return COPY_NULL
 
-def parse_csv(path: pathlib.Path):
-    """Lee un archivo CSV y devuelve las filas como diccionarios."""
-    with path.open("r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            yield row
 
+# Celda NULL en las filas de componentes
+NULL_FIELD = CopyNull()
 
-def upsert_components(conn, category: str, rows):
-    """Inserta o actualiza componentes en la base de datos."""
-    components_payload = []
-    attr_payload = []
-    tag_payload = []
 
-    now = datetime.utcnow()
+def component_id_prefix(category: str):
+    """Devuelve el estado SHA-1 con el que se calculan los IDs de una categoría.
 
-    for raw in rows:
-        # Normalizar nombres de campos
-        normalized = {normalize_field(k): v.strip() if isinstance(v, str) else v
-                      for k, v in raw.items() if k}
+    El ID de un componente es el SHA-1 de ``categoría|nombre|URL``. El prefijo de
+    la categoría se hashea una sola vez; cada ID parte de una copia de este estado
+    a la que se añade ``nombre|URL``.
+    """
+    return hashlib.sha1(f"{category}|".encode("utf-8"))
 
-        name = normalized.get("name")
+
+def parse_csv(path: pathlib.Path):
+    """Lee un archivo CSV y devuelve sus filas como listas.
+
+    La primera fila devuelta es la cabecera, con los nombres de campo ya normalizados.
+    """
+    with path.open("r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        yield [normalize_field(column) for column in header]
+        # Las líneas en blanco llegan como listas vacías
+        yield from filter(None, reader)
+
+
+def create_staging_tables(cur):
+    """Crea las tablas temporales de staging, que se eliminan al terminar la transacción."""
+    cur.execute("""
+        CREATE TEMP TABLE _staging_components
+            (LIKE components INCLUDING DEFAULTS) ON COMMIT DROP;
+        CREATE TEMP TABLE _staging_component_attributes
+            (LIKE component_attributes INCLUDING DEFAULTS) ON COMMIT DROP;
+        CREATE TEMP TABLE _staging_component_tags (
+            component_id TEXT NOT NULL,
+            tag TEXT NOT NULL
+        ) ON COMMIT DROP;
+    """)
+
+
+def copy_file(cur, table: str, columns, path: str, freeze: bool = False):
+    """Envía un archivo CSV (UTF-8) ya preparado a una tabla con un único COPY FROM STDIN.
+
+    Con ``freeze`` las filas se escriben ya congeladas (COPY ... FREEZE), lo que
+    solo es válido si la tabla se vació con TRUNCATE en la transacción actual.
+    """
+    options = f"FORMAT csv, NULL '{COPY_NULL}'"
+    not_null = [column for column in columns if column in NOT_NULL_COLUMNS]
+    if not_null:
+        options += f", FORCE_NOT_NULL ({', '.join(not_null)})"
+    if freeze:
+        options += ", FREEZE"
+    with open(path, "rb") as f:
+        cur.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH ({options})",
+            f,
+            size=COPY_BUFFER_SIZE,
+        )
+
+
+def compile_header(fields):
+    """Resuelve una sola vez por archivo en qué columna está cada campo.
+
+    Devuelve el índice de los campos estándar, la lista ``(columna, campo)`` de
+    los atributos y el ancho mínimo que debe tener cada fila.
+    """
+    # Si una columna aparece repetida gana la última, como con DictReader
+    index = {name: i for i, name in enumerate(fields) if name}
+    std_idx = {name: i for name, i in index.items() if name in STANDARD_FIELDS}
+    attr_idx = sorted((i, name) for name, i in index.items() if name not in STANDARD_FIELDS)
+    width = max(index.values(), default=-1) + 1
+    return std_idx, attr_idx, width
+
+
+def write_rows(rows, std_idx: dict, attr_idx, width: int, category: str, writers: dict):
+    """Escribe los componentes, atributos y tags de un CSV con los writers de cada tabla.
+
+    ``writers`` tiene, por cada tabla de COPY_COLUMNS, una función que recibe una
+    fila. Cada fila del CSV se recorre una sola vez y va directa a las tres, sin
+    acumular nada: si el CSV repite un componente se escriben todas sus filas y
+    los repetidos se resuelven en el merge (o en unique_row_sinks). Devuelve el
+    número de filas leídas y cuántas se han escrito en cada tabla.
+    """
+    counts = dict.fromkeys(COPY_COLUMNS, 0)
+
+    # Las filas se quedan como las listas que devuelve csv.reader y se leen por
+    # posición con estos índices; no se crea ningún registro por fila
+    name_i = std_idx.get("name")
+    if name_i is None:
+        return sum(1 for _ in rows), counts
+    brand_i = std_idx.get("brand")
+    price_i = std_idx.get("price")
+    previous_price_i = std_idx.get("previous_price")
+    image_url_i = std_idx.get("image_url")
+    product_url_i = std_idx.get("product_url")
+    in_stock_i = std_idx.get("in_stock")
+    stock_units_i = std_idx.get("stock_units")
+    # Los IDs se calculan en línea en el bucle, sin una llamada a función por fila
+    new_id_digest = component_id_prefix(category).copy
+    write_component = writers["components"]
+    write_attribute = writers["component_attributes"]
+    write_tag = writers["component_tags"]
+    category_tag = category.lower()
+    processed = component_count = attr_count = tag_count = 0
+
+    for row in rows:
+        processed += 1
+        # Completar filas cortas, como hacía DictReader
+        if len(row) < width:
+            row += [""] * (width - len(row))
+
+        name = row[name_i].strip()
         if not name:
             continue
 
-        brand = normalized.get("brand")
-        product_url = normalized.get("product_url") or normalized.get("url") or ""
-        component_id = hash_component_id(category, name, product_url)
-
-        # Preparar datos del componente
-        component = {
-            "id": component_id,
-            "category": category,
-            "name": name,
-            "brand": brand,
-            "price": float(normalized["price"]) if normalized.get("price") else None,
-            "previous_price": float(normalized["previous_price"]) if normalized.get("previous_price") else None,
-            "image_url": normalized.get("image_url"),
-            "product_url": product_url if product_url else None,
-            "in_stock": bool_from_value(normalized.get("in_stock")) if normalized.get("in_stock") else True,
-            "stock_units": int(normalized["stock_units"]) if normalized.get("stock_units") else 0,
-            "last_updated": now,
-        }
-        components_payload.append(component)
+        brand = row[brand_i].strip() if brand_i is not None else None
+        product_url = row[product_url_i].strip() if product_url_i is not None else ""
+        id_digest = new_id_digest()
+        id_digest.update(f"{name}|{product_url}".encode("utf-8"))
+        component_id = id_digest.hexdigest()
+
+        # Un número mal formado se carga como NULL (o 0 unidades) en lugar de abortar
+        # toda la importación
+        price = float_from_value(row[price_i]) if price_i is not None else None
+        previous_price = float_from_value(row[previous_price_i]) if previous_price_i is not None else None
+        image_url = row[image_url_i].strip() if image_url_i is not None else NULL_FIELD
+        in_stock = row[in_stock_i].strip() if in_stock_i is not None else None
+        stock_units = int_from_value(row[stock_units_i]) if stock_units_i is not None else None
+        in_stock = bool_from_value(in_stock) if in_stock else True
+
+        # Datos del componente, en el orden de COMPONENT_COLUMNS. Las filas llevan
+        # NULL_FIELD en lugar de None, así el csv.writer las serializa enteras en C
+        write_component((
+            component_id,
+            category,
+            name,
+            brand if brand is not None else NULL_FIELD,
+            price if price is not None else NULL_FIELD,
+            previous_price if previous_price is not None else NULL_FIELD,
+            image_url,
+            product_url if product_url else NULL_FIELD,
+            in_stock if in_stock is not None else NULL_FIELD,
+            stock_units if stock_units is not None else 0,
+        ))
+        component_count += 1
 
         # Atributos adicionales (campos que no son estándar)
-        for key, value in normalized.items():
-            if key in STANDARD_FIELDS or not value:
-                continue
-            attr_payload.append({
-                "component_id": component_id,
-                "attribute_key": key,
-                "attribute_value": value,
-            })
-
-        # Tags: marca + categoría
-        tags = set()
-        if brand:
-            tags.add(brand)
-        tags.add(category)
-        for tag in tags:
-            tag_payload.append({
-                "component_id": component_id,
-                "tag": tag,
-            })
-
-    # Insertar componentes
+        for i, key in attr_idx:
+            value = row[i].strip()
+            if value:
+                write_attribute((component_id, key, value))
+                attr_count += 1
+
+        # Tags: categoría + marca, salvo que coincidan (la PK compara en minúsculas)
+        write_tag((component_id, category))
+        tag_count += 1
+        if brand and brand.lower() != category_tag:
+            write_tag((component_id, brand))
+            tag_count += 1
+
+    counts["components"] = component_count
+    counts["component_attributes"] = attr_count
+    counts["component_tags"] = tag_count
+    return processed, counts
+
+
+def unique_row_sinks():
+    """Prepara writers para write_rows que combinan los componentes repetidos.
+
+    Aplican la misma regla que un upsert fila a fila: el componente se queda con
+    los valores de la última fila, los atributos de todas las filas se combinan
+    (gana el último valor de cada clave) y de cada tag se queda el primero, como
+    con ON CONFLICT DO NOTHING. Solo los usa la carga con COPY FREEZE, que escribe
+    en las tablas finales y no puede recibir repetidos, y a cambio guarda en
+    memoria todas las filas del archivo.
+
+    Devuelve los writers y, por cada tabla, las filas ya combinadas.
+    """
+    components = {}
+    attributes = {}
+    tags = {}
+
+    def add_component(row):
+        components[row[0]] = row
+
+    def add_attribute(row):
+        attributes[row[0], row[1]] = row
+
+    def add_tag(row):
+        tags.setdefault((row[0], row[1].lower()), row)
+
+    writers = {
+        "components": add_component,
+        "component_attributes": add_attribute,
+        "component_tags": add_tag,
+    }
+    unique_rows = {
+        "components": components.values(),
+        "component_attributes": attributes.values(),
+        "component_tags": tags.values(),
+    }
+    return writers, unique_rows
+
+
+def prepare_payloads(csv_path: pathlib.Path, category: str, spill_dir: str,
+                     merge_repeated: bool = False):
+    """Parsea un CSV y deja sus filas listas para COPY, sin tocar la base de datos.
+
+    Se ejecuta en un proceso aparte, así que solo recibe y devuelve datos simples:
+    el número de filas leídas y, por cada tabla de COPY_COLUMNS, la ruta del CSV
+    con sus filas y cuántas contiene. Si el archivo está vacío devuelve None.
+
+    Los CSV se escriben en ``spill_dir`` a medida que se parsean, vaciando el
+    buffer de cada tabla cuando se llena, así que la memoria no depende del
+    tamaño del archivo. Quien los carga se encarga de borrarlos.
+
+    Con ``merge_repeated`` los componentes repetidos se combinan aquí con
+    unique_row_sinks; si no, se escriben todas las filas y se combinan en el merge.
+    """
+    rows = parse_csv(csv_path)
+    fields = next(rows, None)
+    first_row = next(rows, None)
+    if first_row is None:
+        return None
+    rows = chain([first_row], rows)
+
+    std_idx, attr_idx, width = compile_header(fields)
+    data = {}
+    with ExitStack() as stack:
+        csv_writers = {}
+        for table in COPY_COLUMNS:
+            fd, data[table] = tempfile.mkstemp(prefix=f"{table}-", suffix=".csv", dir=spill_dir)
+            f = stack.enter_context(
+                open(fd, "w", encoding="utf-8", newline="", buffering=COPY_BUFFER_SIZE)
+            )
+            csv_writers[table] = csv.writer(
+                f, quoting=csv.QUOTE_NONNUMERIC if table == "components" else csv.QUOTE_MINIMAL
+            )
+
+        if merge_repeated:
+            writers, unique_rows = unique_row_sinks()
+            processed, counts = write_rows(rows, std_idx, attr_idx, width, category, writers)
+            for table, csv_writer in csv_writers.items():
+                csv_writer.writerows(unique_rows[table])
+                counts[table] = len(unique_rows[table])
+        else:
+            writers = {table: csv_writer.writerow for table, csv_writer in csv_writers.items()}
+            processed, counts = write_rows(rows, std_idx, attr_idx, width, category, writers)
+
+    return processed, data, counts
+
+
+def truncate_components(cur) -> bool:
+    """Vacía las tablas de componentes para una carga inicial.
+
+    build_components referencia a components, así que TRUNCATE tiene que incluirla;
+    por eso solo se hace si build_components está vacía. Cualquier fila cuenta,
+    también las que tienen component_id a NULL (un hueco de una build guardada),
+    porque el TRUNCATE también las borraría. Devuelve False si hay alguna y no se
+    ha vaciado nada.
+    """
+    # Se toma de una vez el mismo bloqueo que necesita el TRUNCATE: subirlo
+    # después desde uno más débil puede acabar en deadlock con la aplicación
+    cur.execute("""
+        LOCK TABLE components, component_attributes, component_tags, build_components
+        IN ACCESS EXCLUSIVE MODE
+    """)
+    cur.execute("SELECT EXISTS (SELECT 1 FROM build_components)")
+    if cur.fetchone()[0]:
+        return False
+    cur.execute("TRUNCATE components, component_attributes, component_tags, build_components")
+    return True
+
+
+def drop_secondary_indexes(cur):
+    """Elimina los índices secundarios de las tablas de componentes.
+
+    Solo toca los índices que no respaldan una restricción (PK, UNIQUE), que son
+    los que necesita el ON CONFLICT. Devuelve sus definiciones para recrearlos.
+    """
+    cur.execute("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid IN (
+                'components'::regclass,
+                'component_attributes'::regclass,
+                'component_tags'::regclass
+            )
+          AND NOT i.indisunique
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+    """)
+    indexes = cur.fetchall()
+    for index_name, _ in indexes:
+        cur.execute(f"DROP INDEX {index_name}")
+    return [definition for _, definition in indexes]
+
+
+def upsert_components(conn, data: dict, counts: dict):
+    """Inserta o actualiza en la base de datos los componentes preparados por prepare_payloads.
+
+    Usa las tablas de staging creadas por create_staging_tables y las deja vacías
+    para el siguiente archivo. No hace commit: toda la carga va en una sola transacción.
+
+    El staging recibe todas las filas del CSV, también las repetidas. Cada merge
+    se queda con una por clave con DISTINCT ON, y el orden de llegada lo da el
+    ctid: la última fila para componentes y atributos y la primera para los tags,
+    igual que un upsert fila a fila.
+    """
+    components_count = counts["components"]
+    attr_count = counts["component_attributes"]
+    tag_count = counts["component_tags"]
+
     with conn.cursor() as cur:
-        if components_payload:
-            execute_batch(
-                cur,
-                """
+        for table, path in data.items():
+            if counts[table]:
+                copy_file(cur, f"_staging_{table}", COPY_COLUMNS[table], path)
+
+        # Insertar componentes
+        if components_count:
+            cur.execute("""
                 INSERT INTO components (
                     id, category, name, brand, price, previous_price,
                     image_url, product_url, in_stock, stock_units, last_updated
-                ) VALUES (
-                    %(id)s, %(category)s, %(name)s, %(brand)s, %(price)s, %(previous_price)s,
-                    %(image_url)s, %(product_url)s, %(in_stock)s, %(stock_units)s, %(last_updated)s
                 )
+                SELECT DISTINCT ON (id)
+                    id, category, name, brand, price, previous_price,
+                    image_url, product_url, in_stock, stock_units, NOW()
+                FROM _staging_components
+                ORDER BY id, ctid DESC
                 ON CONFLICT (id) DO UPDATE SET
                     brand = EXCLUDED.brand,
                     price = EXCLUDED.price,
@@ -218,50 +596,134 @@ def upsert_components(conn, category: str, rows):
                     stock_units = EXCLUDED.stock_units,
                     last_updated = EXCLUDED.last_updated,
                     updated_at = NOW();
-                """,
-                components_payload,
-                page_size=100,
-            )
-            print(f"  ✓ Insertados/actualizados {len(components_payload)} componentes")
+            """)
+            print(f"  ✓ Insertados/actualizados {components_count} componentes")
 
         # Insertar atributos
-        if attr_payload:
-            execute_batch(
-                cur,
-                """
+        if attr_count:
+            cur.execute("""
                 INSERT INTO component_attributes (component_id, attribute_key, attribute_value)
-                VALUES (%(component_id)s, %(attribute_key)s, %(attribute_value)s)
+                SELECT DISTINCT ON (component_id, attribute_key)
+                    component_id, attribute_key, attribute_value
+                FROM _staging_component_attributes
+                ORDER BY component_id, attribute_key, ctid DESC
                 ON CONFLICT (component_id, attribute_key)
                 DO UPDATE SET attribute_value = EXCLUDED.attribute_value;
-                """,
-                attr_payload,
-                page_size=500,
-            )
-            print(f"  ✓ Insertados/actualizados {len(attr_payload)} atributos")
+            """)
+            print(f"  ✓ Insertados/actualizados {attr_count} atributos")
 
         # Insertar tags
-        if tag_payload:
-            execute_batch(
-                cur,
-                """
+        if tag_count:
+            cur.execute("""
                 INSERT INTO component_tags (component_id, tag)
-                VALUES (%(component_id)s, %(tag)s)
+                SELECT DISTINCT ON (component_id, lower(tag)) component_id, tag
+                FROM _staging_component_tags
+                ORDER BY component_id, lower(tag), ctid
                 ON CONFLICT (component_id, normalized_tag) DO NOTHING;
-                """,
-                tag_payload,
-                page_size=500,
-            )
-            print(f"  ✓ Insertados {len(tag_payload)} tags")
+            """)
+            print(f"  ✓ Insertados {tag_count} tags")
+
+        cur.execute(f"TRUNCATE {', '.join('_staging_' + table for table in COPY_COLUMNS)}")
+
+
+def set_last_updated_default(cur, default):
+    """Cambia el DEFAULT de components.last_updated y devuelve el que tenía.
+
+    COPY no admite expresiones, así que en la carga con FREEZE last_updated se
+    rellena con un DEFAULT NOW() que solo existe mientras dura la transacción.
+    ``default`` es una expresión SQL, o None para quitar el DEFAULT.
+    """
+    # Se busca por regclass para leer el DEFAULT de la misma tabla que modifica el
+    # ALTER TABLE, aunque otro esquema del search_path tenga otra 'components'
+    cur.execute("""
+        SELECT pg_get_expr(d.adbin, d.adrelid)
+        FROM pg_attribute a
+        LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+        WHERE a.attrelid = 'components'::regclass AND a.attname = 'last_updated'
+    """)
+    previous = cur.fetchone()[0]
+    if default is None:
+        cur.execute("ALTER TABLE components ALTER COLUMN last_updated DROP DEFAULT")
+    else:
+        cur.execute(f"ALTER TABLE components ALTER COLUMN last_updated SET DEFAULT {default}")
+    return previous
+
+
+def copy_components_frozen(conn, data: dict, counts: dict):
+    """Copia los componentes preparados por prepare_payloads directamente en sus tablas.
+
+    Solo se usa en la carga inicial, con las tablas recién vaciadas por
+    truncate_components: las filas se escriben con COPY ... FREEZE y no necesitan
+    staging ni merge porque no hay nada con lo que entrar en conflicto.
+    """
+    with conn.cursor() as cur:
+        for table, path in data.items():
+            if counts[table]:
+                copy_file(cur, table, COPY_COLUMNS[table], path, freeze=True)
+
+    print(f"  ✓ Insertados {counts['components']} componentes")
+    print(f"  ✓ Insertados {counts['component_attributes']} atributos")
+    print(f"  ✓ Insertados {counts['component_tags']} tags")
+
+
+def prepare_payloads_in_order(executor, prepare, csv_files, categories, max_pending: int):
+    """Reparte los CSV entre los procesos y devuelve sus resultados en orden.
+
+    ``prepare`` es prepare_payloads, o un partial suyo con el resto de argumentos.
+
+    Genera ``(csv_path, category, payloads)`` en el orden de ``csv_files``. Nunca
+    hay más de ``max_pending`` archivos enviados sin consumir: cada resultado
+    deja en disco el CSV completo de su archivo, así que si la base de datos va
+    más lenta que los procesos el espacio usado no crece con el tamaño del dataset.
+    """
+    jobs = zip(csv_files, categories)
+    pending = deque(
+        (csv_path, category, executor.submit(prepare, csv_path, category))
+        for csv_path, category in islice(jobs, max_pending)
+    )
+    while pending:
+        csv_path, category, future = pending.popleft()
+        payloads = future.result()
+        # El siguiente archivo se envía antes de cargar este, para que los
+        # procesos sigan trabajando mientras tanto
+        for next_path, next_category in islice(jobs, 1):
+            pending.append((next_path, next_category,
+                            executor.submit(prepare, next_path, next_category)))
+        yield csv_path, category, payloads
+
+
+def connect_options(dsn: str):
+    """Devuelve los parámetros de CONNECT_OPTIONS que el usuario no ha fijado.
+
+    psycopg2 da prioridad a los argumentos de connect() sobre el DSN, así que los
+    que ya vienen en el DSN o en su variable de entorno se quitan para no pisarlos.
+    """
+    dsn_options = psycopg2.extensions.parse_dsn(dsn)
+    options = {}
+    for key, value in CONNECT_OPTIONS.items():
+        env_var = CONNECT_OPTIONS_ENV.get(key)
+        if key in dsn_options or (env_var and env_var in os.environ):
+            continue
+        options[key] = value
+    return options
 
-    conn.commit()
 
+def import_dataset(dsn: str, dataset_dir: pathlib.Path, initial_load: bool = False):
+    """Importa todos los archivos CSV del directorio del dataset.
 
-def import_dataset(dsn: str, dataset_dir: pathlib.Path):
-    """Importa todos los archivos CSV del directorio del dataset."""
+    Con ``initial_load`` las tablas de componentes se vacían y se cargan con
+    COPY ... FREEZE, sin índices secundarios, que se recrean al final. Todo
+    ocurre dentro de la misma transacción.
+    """
     print(f"Conectando a la base de datos...")
-    conn = psycopg2.connect(dsn)
+    conn = psycopg2.connect(dsn, **connect_options(dsn))
     
     try:
+        # En una carga masiva no hace falta esperar al flush del WAL en cada
+        # commit; si el servidor cae a mitad, basta con relanzar el script
+        with conn.cursor() as cur:
+            cur.execute("SET synchronous_commit = off")
+
         # Verificar que las tablas existan
         with conn.cursor() as cur:
             cur.execute("""
@@ -280,24 +742,71 @@ def import_dataset(dsn: str, dataset_dir: pathlib.Path):
 
         print(f"\n📦 Encontrados {len(csv_files)} archivos CSV\n")
 
-        total_components = 0
-        for csv_path in csv_files:
-            # Determinar categoría desde el nombre del archivo
-            category_slug = csv_path.stem
-            category = normalize_category(category_slug)
-            
-            print(f"📁 Procesando: {csv_path.name}")
-            print(f"   Categoría: {category}")
-            
-            rows = list(parse_csv(csv_path))
-            if not rows:
-                print(f"   ⚠ Archivo vacío, saltando...")
-                continue
-            
-            upsert_components(conn, category, rows)
-            total_components += len(rows)
-            print()
+        # Determinar categoría desde el nombre del archivo
+        categories = [normalize_category(csv_path.stem) for csv_path in csv_files]
+
+        # COPY FREEZE escribe directamente en las tablas finales, así que cada ID
+        # tiene que llegar una sola vez. Dentro de un archivo lo garantiza
+        # prepare_payloads con merge_repeated, pero
+        # dos archivos con la misma categoría podrían repetir IDs entre sí
+        freeze = initial_load and len(set(categories)) == len(categories)
+
+        index_definitions = []
+        with conn.cursor() as cur:
+            if initial_load:
+                if not truncate_components(cur):
+                    print("❌ Error: --initial-load vacía la tabla 'components', pero hay builds")
+                    print("   guardadas con filas en build_components.")
+                    return False
+                index_definitions = drop_secondary_indexes(cur)
+                print(f"🗂  Carga inicial: tablas vaciadas y {len(index_definitions)} índices secundarios eliminados")
+                if not freeze:
+                    print("   ⚠ Hay archivos con la misma categoría; se cargará sin COPY FREEZE")
+                print()
+            if freeze:
+                previous_last_updated_default = set_last_updated_default(cur, "NOW()")
+            else:
+                create_staging_tables(cur)
 
+        total_components = 0
+        # Los CSV se parsean en paralelo en varios procesos; la carga se hace
+        # en orden y por una sola conexión a medida que llegan los resultados.
+        # Los procesos dejan las filas en archivos temporales de spill_dir
+        workers = min(len(csv_files), os.cpu_count() or 1)
+        with tempfile.TemporaryDirectory(prefix="load-dataset-") as spill_dir, \
+                ProcessPoolExecutor(max_workers=workers) as executor:
+            prepare = partial(prepare_payloads, spill_dir=spill_dir, merge_repeated=freeze)
+            results = prepare_payloads_in_order(executor, prepare, csv_files, categories, workers)
+            for csv_path, category, payloads in results:
+                print(f"📁 Procesando: {csv_path.name}")
+                print(f"   Categoría: {category}")
+
+                if payloads is None:
+                    print(f"   ⚠ Archivo vacío, saltando...")
+                    continue
+
+                processed, data, counts = payloads
+                if freeze:
+                    copy_components_frozen(conn, data, counts)
+                else:
+                    upsert_components(conn, data, counts)
+                for path in data.values():
+                    os.remove(path)
+                total_components += processed
+                print()
+
+        if freeze:
+            with conn.cursor() as cur:
+                set_last_updated_default(cur, previous_last_updated_default)
+
+        if index_definitions:
+            print("🗂  Recreando índices secundarios...")
+            with conn.cursor() as cur:
+                for definition in index_definitions:
+                    cur.execute(definition)
+
+        # Todos los archivos se confirman juntos: o se carga el dataset entero o nada
+        conn.commit()
         print(f"✅ Carga completada: {total_components} componentes procesados")
         return True
         
@@ -338,6 +847,9 @@ Ejemplos:
   
   # Especificando directorio del dataset
   python load-dataset.py --dataset-dir ./mi-dataset/csv
+  
+  # Carga inicial: vacía las tablas de componentes y las carga desde cero
+  python load-dataset.py --initial-load
         """
     )
     
@@ -351,6 +863,12 @@ Ejemplos:
         default=DEFAULT_DATASET_DIR,
         help=f"Directorio con los archivos CSV (default: {DEFAULT_DATASET_DIR})"
     )
+    parser.add_argument(
+        "--initial-load",
+        action="store_true",
+        help="Carga inicial: vacía las tablas de componentes y las carga con COPY FREEZE, "
+             "sin índices secundarios hasta el final"
+    )
     
     args = parser.parse_args()
     
@@ -365,7 +883,7 @@ Ejemplos:
         print(f"❌ Error: El directorio {args.dataset_dir} no existe")
         return 1
     
-    success = import_dataset(dsn, args.dataset_dir)
+    success = import_dataset(dsn, args.dataset_dir, args.initial_load)
     return 0 if success else 1
 
 